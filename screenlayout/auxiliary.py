@@ -18,6 +18,8 @@
 
 # pylint: disable=fixme
 
+from collections import namedtuple
+from functools import lru_cache
 from math import pi
 
 class FileLoadError(Exception):
@@ -36,44 +38,58 @@ class BetterList(list):
     """List that can be split like a string"""
 
     def indices(self, item):
-        i = -1
-        while True:
-            try:
-                i = self.index(item, i + 1)
-            except ValueError:
-                break
-            yield i
+        return [i for i, value in enumerate(self) if value == item]
 
     def split(self, item):
-        indices = list(self.indices(item))
-        yield self[:indices[0]]
-        for x in (self[a + 1:b] for (a, b) in zip(indices[:-1], indices[1:])):
-            yield x
-        yield self[indices[-1] + 1:]
+        start = 0
+        for i in self.indices(item):
+            yield self[start:i]
+            start = i + 1
+        yield self[start:]
 
-class Mode(tuple):
+
+class Mode(namedtuple('Mode', ('width', 'height', 'rate'))):
     """3-tuple of width and height and rate"""
+    __slots__ = ()
+
     def __new__(cls, width, height, rate=None):
-        return super(Mode, cls).__new__(cls, (width, height, rate/1000 if rate is not None else None))
+        return super(Mode, cls).__new__(cls, width, height, rate/1000 if rate is not None else None)
+
+    def __getnewargs__(self):
+        # __new__ takes the rate in mHz, as sway reports it
+        return (self.width, self.height, None if self.rate is None else round(self.rate * 1000))
 
     def __repr__(self):
-        return "{}x{}".format(self[0], self[1]) + "@{}Hz".format(self[2]) if self[2] is not None else ""
+        width, height, rate = self
+        if rate is None:
+            return f"{width}x{height}"
+        return f"{width}x{height}@{rate}Hz"
 
-    width = property(lambda self: self[0])
     heigth = property(lambda self: self[1])
-    rate = property(lambda self: self[2])
 
-class Size(tuple):
+@lru_cache(maxsize=None)
+def _parse_pair(string):
+    """Parse a '<a>x<b>' string into a tuple of two integers (memoized, as the
+    same few strings occur over and over)"""
+    i = string.find("x")
+    if i < 0:
+        raise ValueError("%r is not of the form '<a>x<b>'" % string)
+    return (int(string[:i]), int(string[i + 1:]))
+
+
+class Size(namedtuple('Size', ('width', 'height'))):
     """2-tuple of width and height that can be created from a '<width>x<height>' string"""
+    __slots__ = ()
+
     def __new__(cls, arg):
         if isinstance(arg, str):
-            arg = [int(x) for x in arg.split("x")]
+            arg = _parse_pair(arg)
         arg = tuple(arg)
         assert len(arg) == 2
-        return super(Size, cls).__new__(cls, arg)
+        return super(Size, cls).__new__(cls, *arg)
 
-    width = property(lambda self: self[0])
-    height = property(lambda self: self[1])
+    def __getnewargs__(self):
+        return (tuple(self),)
 
     def __str__(self):
         return "%dx%d" % self
@@ -81,13 +97,14 @@ class Size(tuple):
 
 class NamedSize:
     """Object that behaves like a size, but has an additional name attribute"""
+    __slots__ = ('_size', 'name')
 
     def __init__(self, size, name):
         self._size = size
         self.name = name
 
-    width = property(lambda self: self[0])
-    height = property(lambda self: self[1])
+    width = property(lambda self: self._size[0])
+    height = property(lambda self: self._size[1])
 
     def __str__(self):
         if "%dx%d" % (self.width, self.height) in self.name:
@@ -95,7 +112,7 @@ class NamedSize:
         return "%s (%dx%d)" % (self.name, self.width, self.height)
 
     def __iter__(self):
-        return self._size.__iter__()
+        return iter(self._size)
 
     def __getitem__(self, i):
         return self._size[i]
@@ -104,76 +121,81 @@ class NamedSize:
         return 2
 
 
-class Position(tuple):
+class Position(namedtuple('Position', ('left', 'top'))):
     """2-tuple of left and top that can be created from a '<left>x<top>' string"""
+    __slots__ = ()
+
     def __new__(cls, arg):
         if isinstance(arg, str):
-            arg = [int(x) for x in arg.split("x")]
+            arg = _parse_pair(arg)
         arg = tuple(arg)
         assert len(arg) == 2
-        return super(Position, cls).__new__(cls, arg)
+        return super(Position, cls).__new__(cls, *arg)
 
-    left = property(lambda self: self[0])
-    top = property(lambda self: self[1])
+    def __getnewargs__(self):
+        return (tuple(self),)
 
     def __str__(self):
         return "%dx%d" % self
 
 
-class Rect(tuple):
+class Rect(namedtuple('Rect', ('width', 'height', 'left', 'top'))):
     """4-tuple of width, height, left and top that can be created from an XParseGeometry style string"""
+    __slots__ = ()
+
     def __new__(cls, width, height, left, top):
-        return super(Rect, cls).__new__(cls, (int(width), int(height), int(left), int(top)))
+        return super(Rect, cls).__new__(cls, int(width), int(height), int(left), int(top))
 
     def __str__(self):
         return "%dx%d+%d+%d" % self
 
-    width = property(lambda self: self[0])
-    height = property(lambda self: self[1])
-    left = property(lambda self: self[2])
-    top = property(lambda self: self[3])
-
     position = property(lambda self: Position(self[2:4]))
     size = property(lambda self: Size(self[0:2]))
 
 
 class Transformation:
     """Class to represent the transformation of an output"""
+    __slots__ = ('flipped', 'rotation')
 
     def __init__(self, transform_str):
-        if "flipped" in transform_str:
-            self.flipped = True
-            rotation_str = transform_str.split('-')[-1]
-        else:
-            self.flipped = False
-            rotation_str = transform_str
-        try:
-            self.rotation = Rotation(int(rotation_str))
-        except ValueError:
-            self.rotation = Rotation(0)
+        self.flipped, self.rotation = _TRANSFORMATIONS.get(transform_str, _TRANSFORMATIONS['normal'])
 
     def __repr__(self):
-        representation = ""
-        if self.flipped:
-            representation += "flipped"
-            if self.rotation != 0:
-                representation += "-"
-        if self.rotation != 0:
-            representation += "{:d}".format(self.rotation)
-        elif not self.flipped:
-            representation = "normal"
-        return representation
+        # flipped and rotation may be changed in place, so look the name up
+        # every time rather than caching it on the instance
+        return _TRANSFORMATION_NAMES[self.flipped, self.rotation]
 
 class Rotation(int):
+    _ANGLES = (0.0, pi / 2, pi, 3 * pi / 2)
+    # there are only four rotations, so every value is created just once and
+    # shared; that makes comparisons of rotations identity checks
+    _INSTANCES = {}
+
     def __new__(cls, rotation_deg):
-        value = round(rotation_deg/90)*90
-        assert 0 <= value < 360
-        return super(Rotation, cls).__new__(cls, value)
+        value = (int(rotation_deg) + 45) // 90 * 90 % 360
+        instance = cls._INSTANCES.get((cls, value))
+        if instance is None:
+            instance = cls._INSTANCES[cls, value] = super(Rotation, cls).__new__(cls, value)
+        return instance
 
     @property
     def angle(self):
-        return self/180*pi
+        return self._ANGLES[self // 90]
 
     @property
     def is_odd(self):
-        return self%180 != 0
+        return self in (90, 270)
+
+
+# all transformations sway knows, mapped to (flipped, rotation)
+_TRANSFORMATIONS = {
+    'normal': (False, Rotation(0)),
+    '90': (False, Rotation(90)),
+    '180': (False, Rotation(180)),
+    '270': (False, Rotation(270)),
+    'flipped': (True, Rotation(0)),
+    'flipped-90': (True, Rotation(90)),
+    'flipped-180': (True, Rotation(180)),
+    'flipped-270': (True, Rotation(270)),
+}
+_TRANSFORMATION_NAMES = {value: name for (name, value) in _TRANSFORMATIONS.items()}
@@ -15,14 +15,10 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """Main GUI for ARandR"""
-# pylint: disable=deprecated-method,deprecated-module,wrong-import-order,missing-docstring,wrong-import-position
+# pylint: disable=wrong-import-order,missing-docstring,wrong-import-position
 
 import os
-import optparse
-import inspect
-
-# import os
-# os.environ['DISPLAY']=':0.0'
+from functools import lru_cache, wraps
 
 import gi
 gi.require_version('Gtk', '3.0')
@@ -45,35 +41,47 @@ def actioncallback(function):
 
     A first argument called 'self' is passed through.
     """
-    argnames = inspect.getargspec(function)[0]
+    code = function.__code__
+    argnames = code.co_varnames[:code.co_argcount]
     if argnames[0] == 'self':
         has_self = True
-        argnames.pop(0)
+        argnames = argnames[1:]
     else:
         has_self = False
-    assert len(argnames) in (0, 1)
+    nargs = len(argnames)
+    assert nargs in (0, 1)
 
+    @wraps(function)
     def wrapper(*args):
         args_in = list(args)
         args_out = []
         if has_self:
             args_out.append(args_in.pop(0))
-        if len(argnames) == len(args_in):  # called directly
+        if nargs == len(args_in):  # called directly
             args_out.extend(args_in)
-        elif len(argnames) + 1 == len(args_in):
-            if argnames:
+        elif nargs + 1 == len(args_in):
+            if nargs:
                 args_out.append(args_in[1].props.value)
         else:
             raise TypeError("Arguments don't match")
 
         return function(*args_out)
 
-    wrapper.__name__ = function.__name__
-    wrapper.__doc__ = function.__doc__
     return wrapper
 
 
+@lru_cache(maxsize=1)
+def _license_text():
+    """The GPL text shown in the about dialog, with angle brackets replaced so
+    the dialog does not take them for markup"""
+    with open(os.path.join(os.path.dirname(__file__), 'data', 'gpl-3.txt')) as licensefile:
+        licensetext = licensefile.read()
+    return licensetext.replace('<', u'\u2329 ').replace('>', u' \u232a')
+
+
 class Application:
+    _layoutdir = None
+
     uixml = """
     <ui>
         <menubar name="MenuBar">
@@ -152,6 +160,7 @@ class Application:
         self.uimanager.insert_action_group(actiongroup, 0)
 
         self.uimanager.add_ui_from_string(self.uixml)
+        self._outputs_menu_item = self.uimanager.get_widget('/MenuBar/Outputs')
 
         # widget
         self.widget = widget.ARandRWidget(
@@ -179,6 +188,7 @@ class Application:
         window.show_all()
 
         self.gconf = None
+        self._about_dialog = None
 
     #################### actions ####################
 
@@ -239,11 +249,9 @@ class Application:
         )
 
         result = dialog.run()
-        filenames = dialog.get_filenames()
+        filename = dialog.get_filename()
         dialog.destroy()
         if result == Gtk.ResponseType.ACCEPT:
-            assert len(filenames) == 1
-            filename = filenames[0]
             self.filetemplate = self.widget.load_from_file(filename)
 
     @actioncallback
@@ -254,26 +262,25 @@ class Application:
         dialog.props.do_overwrite_confirmation = True
 
         result = dialog.run()
-        filenames = dialog.get_filenames()
+        filename = dialog.get_filename()
         dialog.destroy()
         if result == Gtk.ResponseType.ACCEPT:
-            assert len(filenames) == 1
-            filename = filenames[0]
             if not filename.endswith('.sh'):
                 filename = filename + '.sh'
             self.widget.save_to_file(filename, self.filetemplate)
 
-    def _new_file_dialog(self, title, dialog_type, buttontype):  # pylint: disable=no-self-use
+    def _new_file_dialog(self, title, dialog_type, buttontype):
         dialog = Gtk.FileChooserDialog(title, None, dialog_type)
         dialog.add_button(Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL)
         dialog.add_button(buttontype, Gtk.ResponseType.ACCEPT)
 
-        layoutdir = os.path.expanduser('~/.screenlayout/')
-        try:
-            os.makedirs(layoutdir)
-        except OSError:
-            pass
-        dialog.set_current_folder(layoutdir)
+        if self._layoutdir is None:
+            self._layoutdir = os.path.expanduser('~/.screenlayout/')
+            try:
+                os.makedirs(self._layoutdir, exist_ok=True)
+            except OSError:
+                pass
+        dialog.set_current_folder(self._layoutdir)
 
         file_filter = Gtk.FileFilter()
         file_filter.set_name('Shell script (Layout file)')
@@ -288,62 +295,53 @@ class Application:
         self._populate_outputs()
 
     def _populate_outputs(self):
-        outputs_widget = self.uimanager.get_widget('/MenuBar/Outputs')
-        outputs_widget.props.submenu = self.widget.contextmenu()
+        self._outputs_menu_item.props.submenu = self.widget.contextmenu()
 
     #################### application related ####################
 
-    def about(self, *_args):  # pylint: disable=no-self-use
-        dialog = Gtk.AboutDialog()
-        dialog.props.program_name = PROGRAMNAME
-        dialog.props.version = __version__
-        dialog.props.translator_credits = "\n".join(TRANSLATORS)
-        dialog.props.copyright = COPYRIGHT
-        dialog.props.comments = PROGRAMDESCRIPTION
-        licensetext = open(os.path.join(os.path.dirname(
-            __file__), 'data', 'gpl-3.txt')).read()
-        dialog.props.license = licensetext.replace(
-            '<', u'\u2329 ').replace('>', u' \u232a')
-        dialog.props.logo_icon_name = 'video-display'
-        dialog.run()
-        dialog.destroy()
+    def about(self, *_args):
+        if self._about_dialog is None:
+            dialog = self._about_dialog = Gtk.AboutDialog()
+            dialog.props.program_name = PROGRAMNAME
+            dialog.props.version = __version__
+            dialog.props.translator_credits = "\n".join(TRANSLATORS)
+            dialog.props.copyright = COPYRIGHT
+            dialog.props.comments = PROGRAMDESCRIPTION
+            dialog.props.license = _license_text()
+            dialog.props.logo_icon_name = 'video-display'
+        # hide instead of destroying, so the dialog can be shown again
+        self._about_dialog.run()
+        self._about_dialog.hide()
 
     def run(self):  # pylint: disable=no-self-use
         Gtk.main()
 
 
 def main():
-    #parser = optparse.OptionParser(
-    #    usage="%prog [savedfile]",
-    #    description="Another XRandrR GUI",
-    #    version="%%prog %s" % __version__
-    #)
-    
-    #parser.add_option(
-    #    '--randr-display',
-    #    help=(
-    #        'Use D as display for xrandr '
-    #        '(but still show the GUI on the display from the environment; '
-    #        'e.g. `localhost:10.0`)'
-    #    ),
-    #    metavar='D'
-    #)
-    #parser.add_option(
-    #    '--force-version',
-    #    help='Even run with untested XRandR versions',
-    #    action='store_true'
-    #)
-
-    #(options, args) = parser.parse_args()
-    #if not args:
-    #    file_to_open = None
-    #elif len(args) == 1:
-    #    file_to_open = args[0]
-    #else:
-    #    parser.usage()
+    import argparse  # only needed here, keep it out of the module import
+
+    parser = argparse.ArgumentParser(
+        usage="%(prog)s [savedfile]",
+        description="Another XRandrR GUI",
+    )
+    parser.add_argument(
+        '--version', action='version', version="%%(prog)s %s" % __version__
+    )
+    parser.add_argument(
+        '--randr-display',
+        help=(
+            'Use D as display for xrandr '
+            '(but still show the GUI on the display from the environment; '
+            'e.g. `localhost:10.0`)'
+        ),
+        metavar='D'
+    )
+    parser.add_argument('savedfile', nargs='?', help=argparse.SUPPRESS)
+
+    options = parser.parse_args()
 
     app = Application(
-        #file=file_to_open,
-        #randr_display=options.randr_display,
+        file=options.savedfile,
+        randr_display=options.randr_display,
     )
     app.run()
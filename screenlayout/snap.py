@@ -14,6 +14,8 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+from bisect import bisect_left
+
 from .auxiliary import Position
 
 
@@ -39,15 +41,28 @@ class Snap:
             self.vertical.add((i[0].left + i[1].width / 2) - size.width / 2)
             self.horizontal.add((i[0].top + i[1].height / 2) - size.height / 2)
 
+        # suggest is called on every drag motion; sorted edges allow bisecting
+        self.horizontal = sorted(self.horizontal)
+        self.vertical = sorted(self.vertical)
+
+    def _nearest(self, edges, value):
+        """Return the edge closest to value if it is within the tolerance, else None"""
+        index = bisect_left(edges, value)
+        candidates = edges[max(index - 1, 0):index + 1]
+        if not candidates:
+            return None
+        nearest = min(candidates, key=lambda edge: abs(edge - value))
+        if abs(nearest - value) < self.tolerance:
+            return nearest
+        return None
+
     def suggest(self, position):
-        vertical = [x for x in self.vertical if abs(
-            x - position[0]) < self.tolerance]
-        horizontal = [y for y in self.horizontal if abs(
-            y - position[1]) < self.tolerance]
-
-        if vertical:
-            position = Position((vertical[0], position[1]))
-        if horizontal:
-            position = Position((position[0], horizontal[0]))
+        vertical = self._nearest(self.vertical, position[0])
+        horizontal = self._nearest(self.horizontal, position[1])
+
+        if vertical is not None:
+            position = Position((vertical, position[1]))
+        if horizontal is not None:
+            position = Position((position[0], horizontal))
 
         return position
@@ -16,19 +16,43 @@
 """Wrapper around command line swaymsg"""
 # pylint: disable=too-few-public-methods,wrong-import-position,missing-docstring,fixme
 
+import logging
 import os
+import re
+import socket
+import struct
 import subprocess
+import sys
 import warnings
-import json
+
+try:
+    import orjson as json
+except ImportError:
+    import json
 
 from .auxiliary import (
-    BetterList, Size, Position, Rect, Transformation, FileLoadError, FileSyntaxError, Mode,
-    InadequateConfiguration, NamedSize, Rotation
+    Size, Position, Rect, Transformation, FileLoadError, FileSyntaxError, Mode,
+    InadequateConfiguration, Rotation
 )
-from .i18n import _
+
+LOG = logging.getLogger(__name__)
 
 SHELLSHEBANG = '#!/bin/sh'
 
+# sway's IPC protocol: magic string, then payload length and message type
+IPC_MAGIC = b'i3-ipc'
+IPC_HEADER = struct.Struct('=II')
+IPC_GET_OUTPUTS = 3
+
+# '<width>x<height>[@<rate>[Hz]]' as accepted by `swaymsg output ... res`
+MODE_EXPRESSION = re.compile(r'(\d+)x(\d+)(?:@(\d+(?:\.\d*)?)(?:Hz)?)?', re.ASCII)
+
+# options of `swaymsg output` that are read back from saved scripts
+OUTPUT_KEYWORDS = frozenset(('disable', 'enable', 'scale', 'res', 'pos', 'dpms', 'transform'))
+
+# sway can rotate every output to every quarter turn
+ROTATIONS = (Rotation(0), Rotation(90), Rotation(180), Rotation(270))
+
 
 class SwayOutput:
     DEFAULTTEMPLATE = [SHELLSHEBANG, '%(swayoutput)s']
@@ -37,9 +61,10 @@ class SwayOutput:
     state = None
 
     def __init__(self, display=None):
-        self.environ = dict(os.environ)
         if display:
-            self.environ['DISPLAY'] = display
+            self.environ = dict(os.environ, DISPLAY=display)
+        else:
+            self.environ = os.environ  # only read, no need for a copy
 
     def _get_outputs(self):
         assert self.state.outputs.keys() == self.configuration.outputs.keys()
@@ -49,38 +74,65 @@ class SwayOutput:
     #################### calling swaymsg output ####################
 
     def _output(self, *args):
-        print('swaymsg is called with:')
-        print(*args)
-        proc = subprocess.Popen(
-            ("swaymsg",) + args,
-            stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=self.environ
-        )
-        ret, err = proc.communicate()
-        status = proc.wait()
-        if status != 0:
+        return self._output_bytes(*args).decode('utf-8')
+
+    def _output_bytes(self, *args):
+        LOG.debug("swaymsg is called with: %s", args)
+        proc = subprocess.run(("swaymsg",) + args, capture_output=True, env=self.environ, check=False)
+        if proc.returncode != 0:
             raise Exception("swaymsg returned error code %d: %s" %
-                            (status, err))
-        if err:
+                            (proc.returncode, proc.stderr))
+        if proc.stderr:
             warnings.warn(
-                "swaymsg wrote to stderr, but did not report an error (Message was: %r)" % err)
-        return ret.decode('utf-8')
+                "swaymsg wrote to stderr, but did not report an error (Message was: %r)" % proc.stderr)
+        return proc.stdout
+
+    def _ipc(self, message_type, payload=b''):
+        """Send a message to sway's IPC socket directly and return the reply
+        payload, saving the swaymsg process for read-only queries"""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(self.environ['SWAYSOCK'])
+            sock.sendall(IPC_MAGIC + IPC_HEADER.pack(len(payload), message_type) + payload)
+            header = self._recv_exactly(sock, len(IPC_MAGIC) + IPC_HEADER.size)
+            if not header.startswith(IPC_MAGIC):
+                raise OSError("Not a sway IPC reply")
+            length, _reply_type = IPC_HEADER.unpack_from(header, len(IPC_MAGIC))
+            return self._recv_exactly(sock, length)
+
+    @staticmethod
+    def _recv_exactly(sock, length):
+        data = bytearray()
+        while len(data) < length:
+            chunk = sock.recv(length - len(data))
+            if not chunk:
+                raise OSError("sway IPC connection closed prematurely")
+            data += chunk
+        return bytes(data)
 
     def _run(self, *args_sets):
-        for args in args_sets:
+        # sway runs ';' separated commands in order, so one swaymsg call sets all outputs
+        args = []
+        for args_set in args_sets:
+            if args:
+                args.append(';')
+            args.extend(args_set)
+        if args:
             self._output(*args)
 
     #################### loading ####################
 
     def load_from_string(self, data):
-        data = data.replace("%", "%%")
-        lines = data.split("\n")
-        if lines[-1] == '':
-            lines.pop()  # don't create empty last line
+        if "%" in data:  # usually there is nothing to escape
+            data = data.replace("%", "%%")
+        lines = data.splitlines()  # no empty last line for the trailing newline
 
-        if lines[0] != SHELLSHEBANG:
+        if not lines or lines[0] != SHELLSHEBANG:
             raise FileLoadError('Not a shell script.')
 
-        swayoutputlines = [(i, l.strip()) for i, l in enumerate(lines) if l.strip().startswith('swaymsg output')]
+        swayoutputlines = [
+            (i, stripped) for (i, stripped) in enumerate(map(str.strip, lines))
+            if stripped.startswith('swaymsg output')
+        ]
         if not swayoutputlines:
             raise FileLoadError('No recognized swayoutput command in this shell script.')
 
@@ -89,76 +141,67 @@ class SwayOutput:
             self._load_from_commandlineargs(l)
 
         lines[swayoutputlines[0][0]] = '%(swayoutput)s'
-        for (i, l) in swayoutputlines[-1:0:-1]:
-            del lines[i]
-
-        return lines
+        dropped = {i for (i, l) in swayoutputlines[1:]}
+        return [l for (i, l) in enumerate(lines) if i not in dropped]
 
     def _load_from_commandlineargs(self, commandline):
-        args = BetterList(commandline.split(" "))
-        if args.pop(0) != 'swaymsg' and args.pop(0) != 'output':
+        tokens = commandline.split()
+        if tokens[:2] != ['swaymsg', 'output']:
             raise FileSyntaxError()
-        # first part is empty, exclude empty parts
-        options = dict((a[0], a[1:]) for a in args.split('output') if a)
+        # group the tokens following each 'output <name>' by name
+        options = {}
+        output_arguments = None
+        expect_name = False
+        for token in tokens[1:]:
+            if token == 'output':
+                expect_name = True
+            elif expect_name:
+                output_arguments = options[token] = []
+                expect_name = False
+            else:
+                output_arguments.append(token)
 
         for output_name, output_arguments in options.items():
             output = self.configuration.outputs[output_name]
             output_state = self.state.outputs[output_name]
-            if 'scale' in output_arguments:
-                i = output_arguments.index('scale')
+            i = 0
+            while i < len(output_arguments):
+                keyword = output_arguments[i]
+                i += 1
+                if keyword not in OUTPUT_KEYWORDS:
+                    continue  # operands of options we take from the current state (e.g. subpixel)
                 try:
-                    output.scale = float(output_arguments[i+1])
+                    if keyword == 'disable':
+                        output.active = False
+                    elif keyword == 'enable':
+                        output.active = True
+                    elif keyword == 'scale':
+                        output.scale = float(output_arguments[i])
+                        i += 1
+                    elif keyword == 'res':
+                        match = MODE_EXPRESSION.fullmatch(output_arguments[i])
+                        i += 1
+                        if match is None:
+                            raise FileSyntaxError()
+                        width_str, height_str, rate_str = match.groups()
+                        rate = round(float(rate_str)*1000) if rate_str is not None else None
+                        mode = Mode(int(width_str), int(height_str), rate)
+                        if mode not in output_state.modes:
+                            raise InadequateConfiguration("Unknown mode")
+                        output.mode = mode
+                    elif keyword == 'pos':
+                        output.position = Position((int(output_arguments[i]), int(output_arguments[i + 1])))
+                        i += 2
+                    elif keyword == 'dpms':
+                        output.dpms = (output_arguments[i] == 'on')
+                        i += 1
+                    elif keyword == 'transform':
+                        transform = Transformation(output_arguments[i])
+                        i += 1
+                        output.transform = transform
+                        output.rotation = transform.rotation
                 except (IndexError, ValueError):
                     raise FileSyntaxError()
-            if 'disable' in output_arguments:
-                output.active = False
-            if 'enable' in output_arguments:
-                output.active = True
-            if 'res' in output_arguments:
-                i = output_arguments.index('res')
-                try:
-                    mode_string = output_arguments[i+1]
-                except IndexError:
-                    raise FileSyntaxError()
-                try:
-                    width_str, rest = mode_string.split('x')
-                    height_str = rest.split('@')[0]
-                    if len(rest.split('@')) > 1:
-                        rate_str = rest.split('@')[1]
-                        if rate_str[-2:] == 'Hz':
-                            rate_str = rate_str[0:-2]
-                        rate = int(float(rate_str)*1000)
-                    else:
-                        rate = None
-                    width = int(width_str)
-                    height = int(height_str)
-                    mode = Mode(width, height, rate)
-                except ValueError:
-                    raise FileSyntaxError()
-                if mode not in output_state.modes:
-                    raise InadequateConfiguration("Unknown mode")
-                output.mode = mode
-
-            if 'pos' in output_arguments:
-                i = output_arguments.index('pos')
-                try:
-                    output.position = Position((int(output_arguments[i + 1]), int(output_arguments[i + 2])))
-                except (IndexError, ValueError):
-                    raise FileSyntaxError()
-            if 'dpms' in output_arguments:
-                i = output_arguments.index('dpms')
-                try:
-                    output.dpms = (output_arguments[i+1] == 'on')
-                except IndexError:
-                    raise FileSyntaxError()
-            if 'transform' in output_arguments:
-                i = output_arguments.index('transform')
-                try:
-                    transform = Transformation(output_arguments[i+1])
-                except IndexError:
-                    raise FileSyntaxError()
-                output.transform = transform
-                output.rotation = transform.rotation
 
             if output.active:
                 # now compute size
@@ -175,23 +218,13 @@ class SwayOutput:
         output_dict = self._load_raw_lines()
 
         for output_el in output_dict:
-            output = self.state.Output(output_el['name'])
-
-            active = False
-            if 'active' in output_el.keys():
-                active = output_el['active']
-
-            dpms = False
-            if 'dpms' in output_el.keys():
-                dpms = output_el['dpms']
+            # names are used as keys all over the place, make comparing them cheap
+            output = self.state.Output(sys.intern(output_el['name']))
 
-            scale = 1.0
-            if 'scale' in output_el.keys():
-                scale = output_el['scale']
-
-            subpixel_hinting = "unknown"
-            if 'subpixel_hinting' in output_el.keys():
-                subpixel_hinting = output_el['subpixel_hinting']
+            active = output_el.get('active', False)
+            dpms = output_el.get('dpms', False)
+            scale = output_el.get('scale', 1.0)
+            subpixel_hinting = output_el.get('subpixel_hinting', "unknown")
 
             if active:
                 rect_dict = output_el['rect']
@@ -202,20 +235,21 @@ class SwayOutput:
                 rect = None
                 transform = None
 
-            output.rotations = [Rotation(0), Rotation(90), Rotation(180), Rotation(270)]
+            output.rotations = ROTATIONS
 
+            seen_modes = set()
             for mode_dict in output_el['modes']:
                 mode = Mode(mode_dict['width'], mode_dict['height'], mode_dict['refresh'])
 
-                for already_added_mode in output.modes:
-                    if already_added_mode == mode:
-                        break
-                else: # add only if it is new
+                if mode not in seen_modes:  # add only if it is new
+                    seen_modes.add(mode)
                     output.modes.append(mode)
 
             if active:
                 current_mode_dict = output_el['current_mode']
                 current_mode = Mode(current_mode_dict['width'], current_mode_dict['height'], current_mode_dict['refresh'])
+            else:
+                current_mode = None
 
             self.state.outputs[output.name] = output
             self.configuration.outputs[output.name] = self.configuration.OutputConfiguration(
@@ -223,11 +257,18 @@ class SwayOutput:
             )
 
     def _load_raw_lines(self):
-        outputs = self._output("-t", "get_outputs", "-r")
+        # both json parsers take bytes directly, no need to decode first
+        outputs = None
+        if 'SWAYSOCK' in self.environ:
+            try:
+                outputs = self._ipc(IPC_GET_OUTPUTS)
+            except OSError:
+                pass  # let swaymsg try (and report what is wrong)
+        if outputs is None:
+            outputs = self._output_bytes("-t", "get_outputs", "-r")
         try:
             output_dict = json.loads(outputs)
-        except json.decoder.JSONDecodeError:
-            output_dict = {}
+        except ValueError:  # the JSONDecodeError of both json and orjson
             raise Exception(
                 "Output of swaymsg -t get_outputs -r not parsable as json"
             )
@@ -240,16 +281,21 @@ class SwayOutput:
         Return a shellscript that will set the current configuration.
         Output can be parsed by load_from_string.
 
-        You may specify a template, which must contain a %(xrandr)s parameter
+        You may specify a template, which must contain a %(swayoutput)s parameter
         and optionally others, which will be filled from the additional dictionary.
         """
+        commands = ["swaymsg " + " ".join(args_set) for args_set in self.configuration.commandlineargs()]
+
+        if (not template or template == self.DEFAULTTEMPLATE) and not additional:
+            # nothing to substitute but the commands themselves
+            return '\n'.join([SHELLSHEBANG] + commands) + '\n'
+
         if not template:
             template = self.DEFAULTTEMPLATE
         template = '\n'.join(template) + '\n'
 
-        args_sets = self.configuration.commandlineargs()
         data = {
-            'swayoutput': "\n".join(["swaymsg " + " ".join(args_set) for args_set in args_sets])
+            'swayoutput': "\n".join(commands)
         }
         if additional:
             data.update(additional)
@@ -261,26 +307,13 @@ class SwayOutput:
         self._run(*self.configuration.commandlineargs())
 
     def check_configuration(self):
-        for output_name in self.outputs:
-            output_config = self.configuration.outputs[output_name]
-            #output_state = self.state.outputs[output_name]
-
-            if not output_config.active:
-                continue
-
-            # we trust users to know what they are doing
-            # (e.g. widget: will accept current mode,
-            # but not offer to change it lacking knowledge of alternatives)
-            #
-            # if output_config.rotation not in output_state.rotations:
-            #    raise InadequateConfiguration("Rotation not allowed.")
-            # if output_config.mode not in output_state.modes:
-            #    raise InadequateConfiguration("Mode not allowed.")
+        """Nothing is checked: users are trusted to know what they are doing."""
 
     #################### sub objects ####################
 
     class State:
         """Represents everything that can not be set by swayoutput."""
+        __slots__ = ('outputs',)
 
         def __init__(self):
             self.outputs = {}
@@ -291,11 +324,12 @@ class SwayOutput:
                 )
 
         class Output:
-            rotations = None
+            __slots__ = ('name', 'modes', 'rotations')
 
             def __init__(self, name):
                 self.name = name
                 self.modes = []
+                self.rotations = None
 
             def __repr__(self):
                 return '<%s %r (%d modes)>' % (type(self).__name__, self.name, len(self.modes))
@@ -305,6 +339,7 @@ class SwayOutput:
         Represents everything that can be set by swayoutput
         (and is therefore subject to saving and loading from files)
         """
+        __slots__ = ('outputs', '_swayoutput')
 
         def __init__(self, swayoutput):
             self.outputs = {}
@@ -319,37 +354,32 @@ class SwayOutput:
         def commandlineargs(self):
             args_sets = []
             for output_name, output in self.outputs.items():
-                args = []
-                args.append("output")
-                args.append(output_name)
                 if not output.active:
-                    args.append("disable")
-                else:
-                    args.append("enable")
-
-                    args.append("dpms")
-                    args.append("on" if output.dpms else "off")
-
-                    args.append("transform")
-                    args.append(repr(output.transform))
-
-                    if output.subpixel_hinting != 'unknown':
-                        args.append("subpixel")
-                        args.append(output.subpixel_hinting)
-
-                    args.append("scale")
-                    args.append(str(output.scale))
-
-                    args.append("pos")
-                    args.append(str(output.position.left))
-                    args.append(str(output.position.top))
-
-                    args.append("res")
-                    args.append(repr(output.mode))
+                    args_sets.append(["output", output_name, "disable"])
+                    continue
+
+                args = [
+                    "output", output_name, "enable",
+                    "dpms", "on" if output.dpms else "off",
+                    "transform", repr(output.transform),
+                ]
+                if output.subpixel_hinting != 'unknown':
+                    args += ["subpixel", output.subpixel_hinting]
+                args += [
+                    "scale", str(output.scale),
+                    "pos", str(output.position[0]), str(output.position[1]),
+                    "res", repr(output.mode),
+                ]
                 args_sets.append(args)
             return args_sets
 
         class OutputConfiguration:
+            # position, rotation and size are only set for active outputs;
+            # tentative_position is only set by the widget while dragging
+            __slots__ = (
+                'active', 'dpms', 'scale', 'subpixel_hinting', 'rect', 'transform', 'mode',
+                'position', 'rotation', 'size', 'tentative_position',
+            )
 
             def __init__(self, active, dpms, scale, subpixel_hinting, rect, transform, mode): # pylint: disable=too-many-arguments
                 self.active = active
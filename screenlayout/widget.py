@@ -22,19 +22,45 @@ from __future__ import division
 import os
 import stat
 
+from functools import lru_cache
 from math import isclose
+from pathlib import Path
 
 import gi
 gi.require_version('Gtk', '3.0')
 gi.require_version('PangoCairo', '1.0')
 from gi.repository import GObject, Gtk, Pango, PangoCairo, Gdk, GLib
-from cairo import LinearGradient, Extend
+from cairo import Content, Context, Extend, Format, ImageSurface, LinearGradient, Matrix, SurfacePattern
 
 from .snap import Snap
 from .swayoutput import SwayOutput
 from .auxiliary import Position, InadequateConfiguration, Rotation, Size, Transformation
 from .i18n import _
 
+# each reflected stripe gradient of the blackout hatching is 5 pixels along
+# both axes, so the crossed pattern repeats after 4 times that
+BLACKOUT_TILE = 20
+
+
+@lru_cache(maxsize=None)
+def _label_font(textheight):
+    """Font description for output labels of the given height, shared
+    between all labels (and layout rebuilds) of that height"""
+    descr = Pango.FontDescription("sans")
+    descr.set_size(textheight * Pango.SCALE)
+    return descr
+
+
+def _reaches_into(rect, clip, margin):
+    """Tell whether the (left, top, width, height) rect, grown by margin on
+    all sides, overlaps the (left, top, right, bottom) clip extents"""
+    left, top, width, height = rect
+    clip_left, clip_top, clip_right, clip_bottom = clip
+    return (
+        left - margin <= clip_right and left + width + margin >= clip_left
+        and top - margin <= clip_bottom and top + height + margin >= clip_top
+    )
+
 
 class ARandRWidget(Gtk.DrawingArea):
 
@@ -43,6 +69,12 @@ class ARandRWidget(Gtk.DrawingArea):
     _draggingoutput = None
     _draggingfrom = None
     _draggingsnap = None
+    _blackout_pattern = None
+    _hit_rects = None
+    _scene_cache = None
+    _draw_order = None
+    _pending_repaint = None
+    _drag_latest = None
 
     __gsignals__ = {
         # 'expose-event':'override', # FIXME: still needed?
@@ -65,6 +97,9 @@ class ARandRWidget(Gtk.DrawingArea):
         self.setup_draganddrop()
 
         self._swayoutput = SwayOutput(display=display)
+        # (output name, text width) -> (laid out Pango layout, offset to center it)
+        self._label_layouts = {}
+        self._menu_cache = {}
 
         self.connect('draw', self.do_expose_event)
 
@@ -72,6 +107,8 @@ class ARandRWidget(Gtk.DrawingArea):
 
     def _set_factor(self, fac):
         self._factor = fac
+        self._blackout_pattern = None  # it is scaled to the factor
+        self._label_layouts.clear()
         self._update_size_request()
         self._force_repaint()
 
@@ -121,7 +158,7 @@ class ARandRWidget(Gtk.DrawingArea):
     #################### loading ####################
 
     def load_from_file(self, file):
-        data = open(file).read()
+        data = Path(file).read_text()
         template = self._swayoutput.load_from_string(data)
         self._swayoutput_was_reloaded()
         return template
@@ -134,6 +171,11 @@ class ARandRWidget(Gtk.DrawingArea):
     def _swayoutput_was_reloaded(self):
         self.sequence = sorted(self._swayoutput.outputs)
         self._lastclick = (-1, -1)
+        self._hit_rects = None
+        self._scene_cache = None
+        self._draw_order = None
+        self._label_layouts.clear()
+        self._menu_cache.clear()
 
         self._update_size_request()
         if self.window:
@@ -146,12 +188,18 @@ class ARandRWidget(Gtk.DrawingArea):
 
     def save_to_file(self, file, template=None, additional=None):
         data = self._swayoutput.save_to_shellscript_string(template, additional)
-        open(file, 'w').write(data)
+        Path(file).write_text(data)
         os.chmod(file, stat.S_IRWXU)
-        self.load_from_file(file)
+        # same as loading the file again, without reading back what was just written
+        self._swayoutput.load_from_string(data)
+        self._swayoutput_was_reloaded()
 
     #################### doing changes ####################
 
+    def _changed(self):
+        self._force_repaint()
+        self.emit('changed')
+
     def _set_something(self, which, output_name, data):
         old = getattr(self._swayoutput.configuration.outputs[output_name], which)
         setattr(self._swayoutput.configuration.outputs[output_name], which, data)
@@ -161,13 +209,10 @@ class ARandRWidget(Gtk.DrawingArea):
             setattr(self._swayoutput.configuration.outputs[output_name], which, old)
             raise
 
-        self._force_repaint()
-        self.emit('changed')
+        self._changed()
 
     def set_position(self, output_name, pos):
         self._set_something('position', output_name, pos)
-        self._force_repaint()
-        self.emit('changed')
 
     def set_rotation(self, output_name, rot):
         output = self._swayoutput.configuration.outputs[output_name]
@@ -176,8 +221,7 @@ class ARandRWidget(Gtk.DrawingArea):
         output.transform.rotation = Rotation(int(rot))
         if output.rotation.is_odd != old_rotation.is_odd:
             output.size = (output.size[1], output.size[0])
-        self._force_repaint()
-        self.emit('changed')
+        self._changed()
 
     def set_resolution(self, output_name, res):
         output = self._swayoutput.configuration.outputs[output_name]
@@ -187,8 +231,7 @@ class ARandRWidget(Gtk.DrawingArea):
             output.size = (int(new_size[1]), int(new_size[0]))
         else:
             output.size = (int(new_size[0]), int(new_size[1]))
-        self._force_repaint()
-        self.emit('changed')
+        self._changed()
 
     def set_scale(self, output_name, scale):
         output = self._swayoutput.configuration.outputs[output_name]
@@ -198,8 +241,7 @@ class ARandRWidget(Gtk.DrawingArea):
             output.size = (int(new_size[1]), int(new_size[0]))
         else:
             output.size = (int(new_size[0]), int(new_size[1]))
-        self._force_repaint()
-        self.emit('changed')
+        self._changed()
 
     def set_active(self, output_name, active):
         output = self._swayoutput.configuration.outputs[output_name]
@@ -224,28 +266,28 @@ class ARandRWidget(Gtk.DrawingArea):
                 output.transform = Transformation('normal')
                 output.rotation = output.transform.rotation
 
-        self._force_repaint()
-        self.emit('changed')
+        self._changed()
 
     def set_flipped(self, output_name, flipped):
         output = self._swayoutput.configuration.outputs[output_name]
 
         output.transform.flipped = flipped
 
-        self._force_repaint()
-        self.emit('changed')
+        self._changed()
 
     def set_dpms(self, output_name, dpms):
         output = self._swayoutput.configuration.outputs[output_name]
 
         output.dpms = dpms
 
-        self._force_repaint()
-        self.emit('changed')
+        self._changed()
 
     #################### painting ####################
 
     def do_expose_event(self, _event, context):
+        if self.sequence is None:  # nothing loaded yet
+            return
+
         allocation = self.get_allocation()
 
         context.rectangle(
@@ -254,163 +296,335 @@ class ARandRWidget(Gtk.DrawingArea):
         )
         context.clip()
 
-        # clear
+        # the scene only changes on modifications, so it is rendered into a
+        # buffer once and exposes just copy that. while dragging, the buffer
+        # holds everything but the dragged output, which is drawn on top.
+        size = (allocation.width, allocation.height)
+        if self._scene_cache is not None and self._scene_cache[0] == size:
+            cache = self._scene_cache[1]
+        else:
+            # a similar surface keeps the device scale of hidpi screens
+            cache = context.get_target().create_similar(
+                Content.COLOR_ALPHA, allocation.width, allocation.height)
+            cache_context = Context(cache)
 
-        context.set_source_rgb(0.25, 0.25, 0.25)
-        context.rectangle(0, 0, allocation.width, allocation.height)
-        context.fill()
-        context.save()
+            # clear
 
-        context.scale(1 / self.factor, 1 / self.factor)
-        context.set_line_width(self.factor * 1.5)
+            cache_context.set_source_rgb(0.25, 0.25, 0.25)
+            cache_context.rectangle(0, 0, allocation.width, allocation.height)
+            cache_context.fill()
 
-        self._draw(self._swayoutput, context)
+            self._prepare_context(cache_context)
+            self._draw(cache_context, [
+                (output_name, output) for (output_name, output) in self._get_draw_order()
+                if output_name != self._draggingoutput
+            ])
+            self._scene_cache = (size, cache)
 
-    def _draw(self, swayoutput, context):  # pylint: disable=too-many-locals
-        cfg = swayoutput.configuration
+        context.set_source_surface(cache, 0, 0)
+        context.paint()
 
-        for output_name in self.sequence:
-            output = cfg.outputs[output_name]
-            if not output.active:
-                continue
+        if self._draggingoutput is not None:
+            context.save()
+            self._prepare_context(context)
+            self._draw(context, [
+                (self._draggingoutput, self._swayoutput.configuration.outputs[self._draggingoutput])
+            ])
+            context.restore()
+
+    def _prepare_context(self, context):
+        context.scale(1 / self.factor, 1 / self.factor)
+        context.set_line_width(self.factor * 1.5)
 
-            rect = (output.tentative_position if hasattr(
-                output, 'tentative_position') else output.position) + tuple(output.size)
+    def _get_draw_order(self):
+        # (name, configuration) of the active outputs, bottom to top
+        if self._draw_order is None:
+            outputs = self._swayoutput.configuration.outputs
+            self._draw_order = [
+                (output_name, outputs[output_name]) for output_name in self.sequence
+                if outputs[output_name].active
+            ]
+        return self._draw_order
+
+    def _draw(self, context, outputs):  # pylint: disable=too-many-locals
+        # only outputs reaching into the damaged area need to be painted; the
+        # border is stroked half outside the rectangle
+        clip = context.clip_extents()
+        margin = context.get_line_width() / 2
+        factor = self.factor
+
+        for output_name, output in outputs:
+            # read everything needed from the output once
+            rotation = output.rotation
+            rect = tuple(getattr(output, 'tentative_position', output.position)) + tuple(output.size)
+            if not _reaches_into(rect, clip, margin):
+                continue
             center = rect[0] + rect[2] / 2, rect[1] + rect[3] / 2
 
-            # paint rectangle
-            context.rectangle(*rect)
+            # paint rectangle; the path is kept for the overlays and the border.
+            # its edges are snapped to whole pixels (multiples of the factor in
+            # layout coordinates), which cairo fills without antialiasing
+            left, top = round(rect[0] / factor), round(rect[1] / factor)
+            right = round((rect[0] + rect[2]) / factor)
+            bottom = round((rect[1] + rect[3]) / factor)
+            context.rectangle(
+                left * factor, top * factor,
+                (right - left) * factor, (bottom - top) * factor
+            )
             context.set_source_rgba(1, 1, 1, 0.7)
-            context.fill()
+            context.fill_preserve()
 
             # show if it is blacked out
             if not output.dpms:
-                context.rectangle(*rect)
-                pattern = LinearGradient(0, 0, 5 * self.factor, 5 * self.factor)
-                pattern.add_color_stop_rgba(0.0, 0, 0, 0, 0.7)
-                pattern.add_color_stop_rgba(0.47, 0, 0, 0, 0.7)
-                pattern.add_color_stop_rgba(0.53, 0, 0, 0, 0)
-                pattern.set_extend(Extend.REFLECT)
-                context.set_source(pattern)
-                context.fill()
-                context.rectangle(*rect)
-                pattern = LinearGradient(0, 0, -5 * self.factor, 5 * self.factor)
-                pattern.add_color_stop_rgba(0.0, 0, 0, 0, 0.7)
-                pattern.add_color_stop_rgba(0.47, 0, 0, 0, 0.7)
-                pattern.add_color_stop_rgba(0.53, 0, 0, 0, 0)
-                pattern.set_extend(Extend.REFLECT)
-                context.set_source(pattern)
-                context.fill()
-
+                context.set_source(self._get_blackout_pattern())
+                context.fill_preserve()
 
             context.set_source_rgb(0, 0, 0)
-            context.rectangle(*rect)
             context.stroke()
 
-            # set up for text
-            context.save()
-            textwidth = rect[3 if output.rotation.is_odd else 2]
-            widthperchar = textwidth / len(output_name)
-            # i think this looks nice and won't overflow even for wide fonts
-            textheight = int(widthperchar * 0.8)
+            # set up for text; only the transformation changes, so that is all
+            # that gets restored afterwards
+            matrix = context.get_matrix()
+            textwidth = rect[3 if rotation.is_odd else 2]
+
+            key = (output_name, textwidth)
+            cached = self._label_layouts.get(key)
+            if cached is None:
+                widthperchar = textwidth / len(output_name)
+                # i think this looks nice and won't overflow even for wide fonts
+                textheight = int(widthperchar * 0.8)
 
-            newdescr = Pango.FontDescription("sans")
-            newdescr.set_size(textheight * Pango.SCALE)
+                # create text; the name is plain text, so there is no markup to escape
+                layout = PangoCairo.create_layout(context)
+                layout.set_font_description(_label_font(textheight))
 
-            # create text
-            output_name_markup = GLib.markup_escape_text(output_name)
-            layout = PangoCairo.create_layout(context)
-            layout.set_font_description(newdescr)
+                layout.set_text(output_name, -1)
 
-            layout.set_markup(output_name_markup, -1)
+                layoutsize = layout.get_pixel_size()
+                layoutoffset = -layoutsize[0] / 2, -layoutsize[1] / 2
+                cached = self._label_layouts[key] = (layout, layoutoffset)
+            else:
+                PangoCairo.update_layout(context, cached[0])
+            layout, layoutoffset = cached
 
             # position text
-            layoutsize = layout.get_pixel_size()
-            layoutoffset = -layoutsize[0] / 2, -layoutsize[1] / 2
             context.move_to(*center)
             if output.transform.flipped:
                 context.scale(-1, 1)
-            context.rotate(output.rotation.angle)
+            context.rotate(rotation.angle)
             context.rel_move_to(*layoutoffset)
 
             # paint text
             PangoCairo.show_layout(context, layout)
-            context.restore()
+            context.set_matrix(matrix)
+
+    def _get_blackout_pattern(self):
+        # the hatching of two crossing stripe gradients repeats every
+        # BLACKOUT_TILE pixels, so it is rendered into a tile once and then
+        # repeated, scaled from layout coordinates to pixels
+        if self._blackout_pattern is None:
+            tile = ImageSurface(Format.ARGB32, BLACKOUT_TILE, BLACKOUT_TILE)
+            tile_context = Context(tile)
+            for direction in (1, -1):
+                gradient = LinearGradient(0, 0, direction * 5, 5)
+                gradient.add_color_stop_rgba(0.0, 0, 0, 0, 0.7)
+                gradient.add_color_stop_rgba(0.47, 0, 0, 0, 0.7)
+                gradient.add_color_stop_rgba(0.53, 0, 0, 0, 0)
+                gradient.set_extend(Extend.REFLECT)
+                tile_context.set_source(gradient)
+                tile_context.paint()
+            pattern = SurfacePattern(tile)
+            pattern.set_extend(Extend.REPEAT)
+            pattern.set_matrix(Matrix(xx=1 / self.factor, yy=1 / self.factor))
+            self._blackout_pattern = pattern
+        return self._blackout_pattern
 
     def _force_repaint(self):
+        # everything that changes the layout repaints, so drop the caches here
+        self._hit_rects = None
+        self._scene_cache = None
+        self._draw_order = None
         # using self.allocation as rect is offset by the menu bar.
         allocation = self.get_allocation()
-        self.queue_draw_area(
-            0, 0, allocation.width, allocation.height
-        )
+        self._queue_repaint(0, 0, allocation.width, allocation.height)
+
+    def _repaint_rects(self, *rects):
+        # rects are (left, top, width, height) in layout coordinates; pad the
+        # union by a few pixels for the border
+        left = min(rect[0] for rect in rects) // self.factor - 2
+        top = min(rect[1] for rect in rects) // self.factor - 2
+        right = max(rect[0] + rect[2] for rect in rects) // self.factor + 3
+        bottom = max(rect[1] + rect[3] for rect in rects) // self.factor + 3
+        # queued right away, as the only caller already runs from an idle callback
+        self.queue_draw_area(int(left), int(top), int(right - left), int(bottom - top))
+
+    def _queue_repaint(self, left, top, right, bottom):
+        # drag motion and batched changes can request many repaints between two
+        # iterations of the main loop; collect them into one area that is
+        # queued once the loop gets idle. the priority is that of GTK's own
+        # resizing and redrawing, so pending events can not postpone it forever
+        if self._pending_repaint is None:
+            GLib.idle_add(self._flush_repaint, priority=GLib.PRIORITY_HIGH_IDLE + 20)
+        else:
+            old_left, old_top, old_right, old_bottom = self._pending_repaint
+            left, top = min(left, old_left), min(top, old_top)
+            right, bottom = max(right, old_right), max(bottom, old_bottom)
+        self._pending_repaint = (left, top, right, bottom)
+
+    def _flush_repaint(self):
+        left, top, right, bottom = self._pending_repaint
+        self._pending_repaint = None
+        self.queue_draw_area(left, top, right - left, bottom - top)
+        return GLib.SOURCE_REMOVE
 
     #################### click handling ####################
 
     def click(self, _widget, event):
         undermouse = self._get_point_outputs(event.x, event.y)
         if event.button == 1 and undermouse:
-            which = self._get_point_active_output(event.x, event.y)
+            sequence = self.sequence
+            which = self._get_topmost(undermouse)
+            index = sequence.index(which)
+            changed = False
             # this was the second click to that stack
             if self._lastclick == (event.x, event.y):
                 # push the highest of the undermouse windows below the lowest
-                newpos = min(self.sequence.index(a) for a in undermouse)
-                self.sequence.remove(which)
-                self.sequence.insert(newpos, which)
-                # sequence changed
-                which = self._get_point_active_output(event.x, event.y)
+                newpos = next(i for i, a in enumerate(sequence) if a in undermouse)
+                if newpos != index:
+                    del sequence[index]
+                    sequence.insert(newpos, which)
+                    changed = True
+                    # sequence changed
+                    which = self._get_topmost(undermouse)
+                    index = sequence.index(which)
             # pull the clicked window to the absolute top
-            self.sequence.remove(which)
-            self.sequence.append(which)
+            if index != len(sequence) - 1:
+                del sequence[index]
+                sequence.append(which)
+                changed = True
 
             self._lastclick = (event.x, event.y)
-            self._force_repaint()
+            if changed:
+                self._force_repaint()
         if event.button == 3:
             if undermouse:
-                target = [a for a in self.sequence if a in undermouse][-1]
+                target = self._get_topmost(undermouse)
                 menu = self._contextmenu(target)
-                menu.popup(None, None, None, None, event.button, event.time)
+                menu.popup_at_pointer(event)
             else:
-                menu = self.contextmenu()
-                menu.popup(None, None, None, None, event.button, event.time)
+                menu = self.contextmenu(popup=True)
+                menu.popup_at_pointer(event)
 
         # deposit for drag and drop until better way found to determine exact starting coordinates
         self._lastclick = (event.x, event.y)
 
     def _get_point_outputs(self, x, y):
         x, y = x * self.factor, y * self.factor
-        outputs = set()
-        for output_name, output in self._swayoutput.configuration.outputs.items():
-            if not output.active:
-                continue
-            if (
-                    output.position[0] - self.factor <= x <= output.position[0] + output.size[0] + self.factor
-            ) and (
-                output.position[1] - self.factor <= y <= output.position[1] + output.size[1] + self.factor
-            ):
-                outputs.add(output_name)
-        return outputs
+        if self._hit_rects is None:
+            self._hit_rects = self._build_hit_rects()
+        # a list: there are only ever a few hits, for which membership tests
+        # are cheaper than building and hashing a set
+        return [
+            output_name for (output_name, left, top, right, bottom) in self._hit_rects
+            if left <= x <= right and top <= y <= bottom
+        ]
+
+    def _build_hit_rects(self):
+        # (name, left, top, right, bottom) of all active outputs, grown by the
+        # click tolerance, so the per-event test is four comparisons each
+        return [
+            (
+                output_name,
+                output.position[0] - self.factor, output.position[1] - self.factor,
+                output.position[0] + output.size[0] + self.factor,
+                output.position[1] + output.size[1] + self.factor,
+            )
+            for output_name, output in self._swayoutput.configuration.outputs.items()
+            if output.active
+        ]
 
     def _get_point_active_output(self, x, y):
         undermouse = self._get_point_outputs(x, y)
         if not undermouse:
             raise IndexError("No output here.")
-        active = [a for a in self.sequence if a in undermouse][-1]
-        return active
+        return self._get_topmost(undermouse)
+
+    def _get_topmost(self, output_names):
+        for output_name in reversed(self.sequence):
+            if output_name in output_names:
+                return output_name
+        raise IndexError("None of the outputs is in the sequence.")
 
     #################### context menu ####################
 
-    def contextmenu(self):
+    # menus are only rebuilt when the state they show changed since the last
+    # popup; the cache holds the latest (fingerprint, menu) per output name,
+    # and under (None, <use>) for the menus of all outputs. the menu shown in
+    # the menu bar and the one popped up over the background are kept apart,
+    # as the former stays attached to its menu bar item.
+
+    def _menu_fingerprint(self, output_name):
+        output_config = self._swayoutput.configuration.outputs[output_name]
+        if not output_config.active:
+            return (output_name, False)
+        output_state = self._swayoutput.state.outputs[output_name]
+        return (
+            output_name, True, tuple(output_state.modes), tuple(output_state.rotations or ()),
+            output_config.mode, output_config.rotation, output_config.scale,
+            output_config.transform.flipped, output_config.dpms,
+        )
+
+    def contextmenu(self, popup=False):
+        key = (None, 'popup' if popup else 'menubar')
+        fingerprint = tuple(self._menu_fingerprint(output_name) for output_name in self._swayoutput.outputs)
+        cached = self._menu_cache.get(key)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+
         menu = Gtk.Menu()
         for output_name in self._swayoutput.outputs:
             i = Gtk.MenuItem(output_name)
-            i.props.submenu = self._contextmenu(output_name)
+            # submenus are only filled when their item gets selected
+            i.props.submenu = Gtk.Menu()
+            i.connect('select', self._fill_output_submenu, output_name, key)
             menu.add(i)
 
         menu.show_all()
+        self._menu_cache[key] = (fingerprint, menu)
+        self._forget_menu_on_toggle(menu, key)
         return menu
 
-    def _contextmenu(self, output_name):  # pylint: disable=too-many-locals, too-many-statements
-        menu = Gtk.Menu()
+    def _contextmenu(self, output_name):
+        fingerprint = self._menu_fingerprint(output_name)
+        cached = self._menu_cache.get(output_name)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+
+        menu = self._build_contextmenu(output_name)
+        self._menu_cache[output_name] = (fingerprint, menu)
+        self._forget_menu_on_toggle(menu, output_name)
+        return menu
+
+    def _fill_output_submenu(self, item, output_name, key):
+        submenu = item.props.submenu
+        if submenu.get_children():
+            return
+        self._build_contextmenu(output_name, submenu)
+        self._forget_menu_on_toggle(submenu, key)
+
+    def _forget_menu_on_toggle(self, menu, key):
+        # a toggled check item no longer shows the state if the change was
+        # refused or did not change anything, so such a menu is not reused
+        for item in menu.get_children():
+            if isinstance(item, Gtk.CheckMenuItem):
+                item.connect('toggled', lambda _item: self._menu_cache.pop(key, None))
+            submenu = item.get_submenu()
+            if submenu is not None:
+                self._forget_menu_on_toggle(submenu, key)
+
+    def _build_contextmenu(self, output_name, menu=None):  # pylint: disable=too-many-locals, too-many-statements
+        if menu is None:
+            menu = Gtk.Menu()
         output_config = self._swayoutput.configuration.outputs[output_name]
         output_state = self._swayoutput.state.outputs[output_name]
 
@@ -568,6 +782,7 @@ class ARandRWidget(Gtk.DrawingArea):
 
         self._draggingoutput = output
         self._draggingfrom = self._lastclick
+        self._force_repaint()  # the dragged output moves out of the scene buffer
         Gtk.drag_set_icon_stock(context, Gtk.STOCK_FULLSCREEN, 10, 10)
 
         self._draggingsnap = Snap(
@@ -589,22 +804,42 @@ class ARandRWidget(Gtk.DrawingArea):
 
         Gdk.drag_status(context, Gdk.DragAction.MOVE, time)
 
+        # motion events can arrive much faster than frames are drawn; only the
+        # latest pointer position is snapped, once the main loop gets idle (but
+        # ahead of GTK's redrawing, so the new position makes it into the frame)
+        if self._drag_latest is None:
+            GLib.idle_add(self._drag_flush, priority=GLib.PRIORITY_HIGH_IDLE + 10)
+        self._drag_latest = (x, y)
+
+        return True
+
+    def _drag_flush(self):
+        if self._drag_latest is None or not self._draggingoutput:
+            self._drag_latest = None
+            return GLib.SOURCE_REMOVE
+        x, y = self._drag_latest
+        self._drag_latest = None
+
         rel = x - self._draggingfrom[0], y - self._draggingfrom[1]
 
-        oldpos = self._swayoutput.configuration.outputs[self._draggingoutput].position
+        output = self._swayoutput.configuration.outputs[self._draggingoutput]
+        oldpos = output.position
+        previous = getattr(output, 'tentative_position', oldpos)
         newpos = Position(
             (int(oldpos[0] + self.factor * rel[0]), int(oldpos[1] + self.factor * rel[1])))
-        self._swayoutput.configuration.outputs[
-            self._draggingoutput
-        ].tentative_position = self._draggingsnap.suggest(newpos)
-        self._force_repaint()
-
-        return True
+        output.tentative_position = self._draggingsnap.suggest(newpos)
+        # only the area the output moved out of and into needs a repaint
+        self._repaint_rects(
+            tuple(previous) + tuple(output.size),
+            tuple(output.tentative_position) + tuple(output.size)
+        )
+        return GLib.SOURCE_REMOVE
 
     def _dragdrop_cb(self, widget, context, x, y, time):  # pylint: disable=too-many-arguments
         if not self._draggingoutput:
             return
 
+        self._drag_flush()  # the drop position is that of the last motion event
         try:
             self.set_position(
                 self._draggingoutput,